@@ -1,29 +1,394 @@
 """
 Library Manager - Core logic for managing library data
 """
+import csv
+import numpy as np
 import pandas as pd
 import os
+from collections import Counter, OrderedDict
 from pathlib import Path
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    # Optional: pyarrow's multithreaded parser makes loading large libraries faster
+    pa = pacsv = None
+
 class LibraryManager:
     """Manages library data operations"""
     
     COLUMNS = ['ISBN', 'Title', 'Author', 'Publisher', 'Year', 'Signature', 'Description', 'Keywords']
     
+    # Filter dict keys and the column each one searches
+    FILTER_COLUMNS = {
+        'isbn': 'ISBN',
+        'title': 'Title',
+        'author': 'Author',
+        'publisher': 'Publisher',
+        'year': 'Year',
+        'signature': 'Signature',
+    }
+    
+    # Columns the filters search; only these are lowercased for matching
+    SEARCH_COLUMNS = tuple(FILTER_COLUMNS.values()) + ('Keywords',)
+    
+    # Number of distinct filter results kept in memory
+    FILTER_CACHE_SIZE = 32
+    
+    # Below this many candidate rows a plain scan beats intersecting trigram postings
+    TRIGRAM_MIN_ROWS = 1000
+    
+    # A column's trigram index is only requested by a query whose candidates are at least
+    # this fraction of all rows; it is built off the main thread (see trigram_build_job)
+    # and until then, like narrower queries, the query scans the column
+    TRIGRAM_BUILD_FRACTION = 0.9
+    
+    # Columns with few distinct values, searched once per distinct value instead of per row
+    LOW_CARDINALITY_COLUMNS = ('Publisher', 'Year')
+    
+    # Cells read as missing values (pandas' read_csv defaults; pyarrow's lack 'None' and '<NA>')
+    NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                 '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+    
     def __init__(self, data_file):
         self.data_file = data_file
         self.df = self.load_data()
+        self._file_stamp = self._get_file_stamp()
+        # Kept in sync by add/update/delete; reset when the data is replaced
+        self._signature_counts = None
+        # Last parsed import file as ((path, stamp), DataFrame), shared by conflict check and import
+        self._import_cache = None
+        self._lower = None
+        self._records = None
+        self._keyword_index = None
+        self._trigrams = {}
+        # Columns whose trigram index a search asked for, and a counter bumped on every data
+        # change so an index built from older data is not installed
+        self._trigrams_wanted = set()
+        self._data_version = 0
+        self._factorized = {}
+        self._isbn_index = None
+        self._filter_cache = OrderedDict()
+        self._last_query = None
     
     def load_data(self):
         """Load data from CSV file (semicolon-separated)"""
         if os.path.exists(self.data_file):
             try:
-                df = pd.read_csv(self.data_file, sep=';', dtype={'Signature': 'object', 'Year': 'object'})
+                df = self._read_csv(self.data_file)
                 return df
             except Exception:
                 return self._create_empty_dataframe()
         return self._create_empty_dataframe()
     
+    def _get_file_stamp(self, file_path=None):
+        """Get (mtime, size) of a file (the data file by default), or None if it doesn't exist"""
+        try:
+            stat = os.stat(file_path or self.data_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def reload(self):
+        """Reload data from the CSV file if it changed since it was last read or written
+        
+        Returns True if the data was reloaded.
+        """
+        stamp = self._get_file_stamp()
+        if stamp == self._file_stamp:
+            return False
+        self.df = self.load_data()
+        self._file_stamp = stamp
+        self._signature_counts = None
+        self._invalidate_cache()
+        return True
+    
+    def _read_csv(self, file_path):
+        """Read a semicolon-separated CSV file, using pyarrow's parser when it is installed
+        
+        Both parsers read every column but ISBN as text and treat the same cells
+        as missing, so the known columns come out the same either way.
+        """
+        text_columns = [col for col in self.COLUMNS if col != 'ISBN']
+        if pacsv is not None:
+            try:
+                table = pacsv.read_csv(
+                    file_path,
+                    parse_options=pacsv.ParseOptions(delimiter=';', newlines_in_values=True),
+                    convert_options=pacsv.ConvertOptions(
+                        column_types={col: pa.string() for col in text_columns},
+                        null_values=self.NA_VALUES,
+                        strings_can_be_null=True
+                    )
+                )
+                df = table.to_pandas()
+                # Empty cells come back as None; use NaN like pd.read_csv does
+                return df.where(df.notna(), np.nan)
+            except pa.ArrowException:
+                pass  # Fall back to pandas' own parser
+        return pd.read_csv(file_path, sep=';', dtype={col: 'object' for col in text_columns},
+                           keep_default_na=False, na_values=self.NA_VALUES)
+    
+    def _read_import_csv(self, file_path):
+        """Read an import file, reusing the last parse if the file hasn't changed since"""
+        key = (os.path.abspath(file_path), self._get_file_stamp(file_path))
+        if self._import_cache is not None and self._import_cache[0] == key:
+            return self._import_cache[1]
+        df = self._read_csv(file_path)
+        self._import_cache = (key, df)
+        return df
+    
+    def _invalidate_cache(self):
+        """Drop all cached column data and filter results after self.df has been replaced"""
+        self._lower = None
+        self._records = None
+        self._keyword_index = None
+        self._trigrams = {}
+        self._factorized = {}
+        self._isbn_index = None
+        self._forget_results()
+    
+    def _forget_results(self):
+        """Drop cached filter results after the data changed (they hold row positions)"""
+        self._filter_cache.clear()
+        self._last_query = None
+        self._data_version += 1
+    
+    def _search_cells(self, row):
+        """Get the lowercased searched cells of a record tuple, like _get_lower stores them"""
+        return {col: str(row[self.COLUMNS.index(col)]).lower() for col in self.SEARCH_COLUMNS}
+    
+    def _cache_add_row(self, row):
+        """Update the caches for a record appended to self.df, instead of dropping them"""
+        pos = len(self.df) - 1
+        if self._records is not None:
+            self._records.append(row)
+        if self._isbn_index is not None:
+            self._isbn_index.setdefault(str(row[0]).strip(), pos)
+        
+        if self._lower is None:
+            # Nothing derived from the lowercased columns can be cached either
+            self._keyword_index = None
+            self._trigrams = {}
+            self._factorized = {}
+        else:
+            cells = self._search_cells(row)
+            for col, cell in cells.items():
+                self._lower[col] = np.append(self._lower[col], np.array([cell], dtype=object))
+            if self._keyword_index is not None:
+                self._postings_add(self._keyword_index, self._keyword_tokens(cells['Keywords']), pos)
+            for col, index in self._trigrams.items():
+                self._postings_add(index, self._trigrams_of(cells[col]), pos)
+            for col, (codes, uniques) in list(self._factorized.items()):
+                code = self._factorized_code(col, cells[col])
+                self._factorized[col] = (np.append(codes, code), self._factorized[col][1])
+        self._forget_results()
+    
+    def _cache_replace_row(self, pos, old_row, row):
+        """Update the caches for a record of self.df changed in place from old_row to row"""
+        if self._records is not None:
+            self._records[pos] = row
+        if self._isbn_index is not None and str(old_row[0]).strip() != str(row[0]).strip():
+            # The old ISBN's first row may now be a later one; rebuilt on demand
+            self._isbn_index = None
+        
+        if self._lower is None:
+            self._keyword_index = None
+            self._trigrams = {}
+            self._factorized = {}
+        else:
+            old_cells = self._search_cells(old_row)
+            for col, cell in self._search_cells(row).items():
+                old_cell = old_cells[col]
+                if cell == old_cell:
+                    continue
+                self._lower[col][pos] = cell
+                if col == 'Keywords' and self._keyword_index is not None:
+                    old_tokens, tokens = self._keyword_tokens(old_cell), self._keyword_tokens(cell)
+                    self._postings_remove(self._keyword_index, old_tokens - tokens, pos)
+                    self._postings_add(self._keyword_index, tokens - old_tokens, pos)
+                if col in self._trigrams:
+                    old_grams, grams = self._trigrams_of(old_cell), self._trigrams_of(cell)
+                    self._postings_remove(self._trigrams[col], old_grams - grams, pos)
+                    self._postings_add(self._trigrams[col], grams - old_grams, pos)
+                if col in self._factorized:
+                    code = self._factorized_code(col, cell)
+                    self._factorized[col][0][pos] = code
+        self._forget_results()
+    
+    def _cache_delete_rows(self, indices):
+        """Update the caches for the rows at sorted positions indices removed from self.df"""
+        if self._records is not None:
+            removed = set(indices)
+            self._records = [r for i, r in enumerate(self._records) if i not in removed]
+        # Positions after the deleted rows shift; rebuilt on demand
+        self._isbn_index = None
+        
+        if self._lower is None:
+            self._keyword_index = None
+            self._trigrams = {}
+            self._factorized = {}
+        else:
+            deleted = np.array(indices, dtype=np.intp)
+            if self._keyword_index is not None:
+                for pos in indices:
+                    self._postings_remove(self._keyword_index, self._keyword_tokens(self._lower['Keywords'][pos]), pos)
+                self._postings_shift(self._keyword_index, deleted)
+            for col, index in self._trigrams.items():
+                for pos in indices:
+                    self._postings_remove(index, self._trigrams_of(self._lower[col][pos]), pos)
+                self._postings_shift(index, deleted)
+            for col in self._lower:
+                self._lower[col] = np.delete(self._lower[col], deleted)
+            for col, (codes, uniques) in list(self._factorized.items()):
+                self._factorized[col] = (np.delete(codes, deleted), uniques)
+        self._forget_results()
+    
+    def _get_records(self):
+        """Get all rows as tuples, with missing values as '' (built once per data change)"""
+        if self._records is None:
+            self._records = list(self.df.fillna('').itertuples(index=False, name=None))
+        return self._records
+    
+    @staticmethod
+    def _as_record(values):
+        """Turn row values into a record tuple like _get_records does (missing values as '')"""
+        return tuple('' if v is None or v != v else v for v in values)
+    
+    def _get_lower(self):
+        """Get lowercased string arrays for each searched column (built once per data change)"""
+        if self._lower is None:
+            self._lower = {
+                col: np.array([str(v).lower() for v in self.df[col].fillna('').to_numpy()], dtype=object)
+                for col in self.SEARCH_COLUMNS
+            }
+        return self._lower
+    
+    @staticmethod
+    def _keyword_tokens(cell):
+        """Get the distinct comma-separated tokens of a lowercased Keywords cell"""
+        return set(kw.strip() for kw in cell.split(','))
+    
+    @staticmethod
+    def _build_postings(cells, keys_of):
+        """Build an inverted index mapping each key of keys_of(cell) to the sorted rows that have it"""
+        postings = {}
+        for i, cell in enumerate(cells):
+            for key in keys_of(cell):
+                postings.setdefault(key, []).append(i)
+        return {key: np.array(rows, dtype=np.intp) for key, rows in postings.items()}
+    
+    @staticmethod
+    def _postings_add(postings, keys, pos):
+        """Add row pos to the posting arrays of keys, keeping them sorted"""
+        for key in keys:
+            rows = postings.get(key)
+            if rows is None:
+                postings[key] = np.array([pos], dtype=np.intp)
+            else:
+                postings[key] = np.insert(rows, np.searchsorted(rows, pos), pos)
+    
+    @staticmethod
+    def _postings_remove(postings, keys, pos):
+        """Remove row pos from the posting arrays of keys, dropping keys left without rows"""
+        for key in keys:
+            rows = postings[key]
+            rows = rows[rows != pos]
+            if len(rows):
+                postings[key] = rows
+            else:
+                del postings[key]
+    
+    @staticmethod
+    def _postings_shift(postings, deleted):
+        """Renumber the rows in postings after the rows at deleted (sorted array) were removed"""
+        first = deleted[0]
+        for key, rows in postings.items():
+            if rows[-1] > first:
+                postings[key] = rows - np.searchsorted(deleted, rows)
+    
+    def _get_keyword_index(self):
+        """Get the inverted index mapping each keyword token to the rows that have it"""
+        if self._keyword_index is None:
+            self._keyword_index = self._build_postings(self._get_lower()['Keywords'], self._keyword_tokens)
+        return self._keyword_index
+    
+    @staticmethod
+    def _trigrams_of(cell):
+        """Get the distinct 3-character substrings of a lowercased cell"""
+        return set(cell[j:j + 3] for j in range(len(cell) - 2))
+    
+    def trigram_build_job(self):
+        """Get a function building a trigram index that searches asked for, or None if none is wanted
+        
+        Building one takes a second or more per column on a large library, so the
+        function only works on a snapshot of the column and can run on a worker
+        thread. Pass its result to install_trigram_index on the main thread.
+        """
+        while self._trigrams_wanted:
+            col = self._trigrams_wanted.pop()
+            if col not in self._trigrams:
+                cells = self._get_lower()[col].copy()
+                version = self._data_version
+                return lambda: (col, version, self._build_postings(cells, self._trigrams_of))
+        return None
+    
+    def install_trigram_index(self, built):
+        """Start using an index returned by a trigram_build_job function, unless the data changed since"""
+        col, version, index = built
+        if version == self._data_version:
+            self._trigrams[col] = index
+    
+    def _get_factorized(self, col):
+        """Get (codes, distinct values) of a lowercased column"""
+        factorized = self._factorized.get(col)
+        if factorized is None:
+            factorized = pd.factorize(self._get_lower()[col])
+            self._factorized[col] = factorized
+        return factorized
+    
+    def _factorized_code(self, col, cell):
+        """Get the code of a lowercased value in a factorized column, adding it if it is new"""
+        codes, uniques = self._factorized[col]
+        hit = np.flatnonzero(uniques == cell)
+        if len(hit):
+            return hit[0]
+        self._factorized[col] = (codes, np.append(uniques, np.array([cell], dtype=object)))
+        return len(uniques)
+    
+    def _get_signature_counts(self):
+        """Get a Counter of how many records use each signature"""
+        if self._signature_counts is None:
+            self._signature_counts = Counter(self.df['Signature'].dropna())
+        return self._signature_counts
+    
+    def _discard_signature(self, signature):
+        """Remove one use of a signature from the signature counts"""
+        counts = self._get_signature_counts()
+        if not pd.isna(signature) and counts[signature]:
+            counts[signature] -= 1
+            if not counts[signature]:
+                del counts[signature]
+    
+    def _get_isbn_index(self):
+        """Get a dict mapping each (stripped) ISBN to the position of its first row"""
+        if self._isbn_index is None:
+            index = {}
+            for i, isbn in enumerate(self.df['ISBN'].fillna('').astype(str).str.strip()):
+                index.setdefault(isbn, i)
+            self._isbn_index = index
+        return self._isbn_index
+    
+    def get_index_by_isbn(self, isbn):
+        """Get the position of the first record with the given ISBN, or None if there is none"""
+        return self._get_isbn_index().get(str(isbn).strip())
+    
+    def get_by_isbn(self, isbn):
+        """Get the record with the given ISBN as a tuple, or None if there is none"""
+        pos = self.get_index_by_isbn(isbn)
+        return None if pos is None else self._get_records()[pos]
+    
     def _create_empty_dataframe(self):
         """Create an empty dataframe with the correct columns"""
         return pd.DataFrame(columns=self.COLUMNS)
@@ -32,33 +397,69 @@ class LibraryManager:
         """Save data to CSV file (semicolon-separated)"""
         os.makedirs(os.path.dirname(self.data_file) or '.', exist_ok=True)
         self.df.to_csv(self.data_file, sep=';', index=False)
+        self._file_stamp = self._get_file_stamp()
+    
+    def _write_records(self, f, records, header=True):
+        """Write records (tuples in COLUMNS order) as semicolon-separated rows to an open file"""
+        writer = csv.writer(f, delimiter=';', lineterminator=os.linesep)
+        if header:
+            writer.writerow(self.COLUMNS)
+        # Write missing values (NaN, the only value not equal to itself) as empty cells like to_csv
+        writer.writerows(tuple('' if v != v else v for v in row) for row in records)
+    
+    def _append_record(self, record):
+        """Append one record to the data file instead of rewriting the whole file
+        
+        Falls back to save_data() unless the file is exactly what we last read or
+        wrote and its columns are in COLUMNS order.
+        """
+        stamp = self._get_file_stamp()
+        if stamp is None or stamp != self._file_stamp or stamp[1] == 0 or list(self.df.columns) != self.COLUMNS:
+            self.save_data()
+            return
+        
+        with open(self.data_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            ends_with_newline = f.read(1) in (b'\n', b'\r')
+        with open(self.data_file, 'a', newline='', encoding='utf-8') as f:
+            if not ends_with_newline:
+                f.write(os.linesep)
+            self._write_records(f, [record], header=False)
+        self._file_stamp = self._get_file_stamp()
+    
+    def export_records(self, records, file_path):
+        """Write records (list of tuples) to a CSV file (semicolon-separated)"""
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            self._write_records(f, records)
     
     def get_all_records(self):
         """Get all records as list of tuples"""
-        return [tuple(row) for row in self.df.values]
+        # Copy the list so callers can't modify the cache; the tuples are shared
+        return list(self._get_records())
     
     def add_record(self, book_data):
-        """Add a new book record"""
+        """Add a new book record and return it as a tuple (like get_all_records rows)"""
         isbn, title, author, publisher, year, signature, description, keywords = book_data
         
         # Check for duplicate signature if provided
+        signature_counts = self._get_signature_counts()
         if signature and not pd.isna(signature):
-            if signature in self.df['Signature'].values:
+            if signature_counts[signature]:
                 raise ValueError(f"Signature '{signature}' already exists")
         
-        new_record = pd.DataFrame([{
-            'ISBN': isbn,
-            'Title': title,
-            'Author': author,
-            'Publisher': publisher,
-            'Year': year,
-            'Signature': signature if signature else None,
-            'Description': description,
-            'Keywords': keywords
-        }])
+        record = (isbn, title, author, publisher, year, signature if signature else None, description, keywords)
+        new_record = pd.DataFrame([record], columns=self.COLUMNS)
         
         self.df = pd.concat([self.df, new_record], ignore_index=True)
-        self.save_data()
+        if signature:
+            signature_counts[signature] += 1
+        
+        # Keep the caches, just add the new row
+        row = self._as_record(record)
+        self._cache_add_row(row)
+        # Only the new row needs writing; the rest of the file is unchanged
+        self._append_record(record)
+        return row
     
     def update_record(self, index, book_data, original_isbn=None):
         """Update a book record by finding it by ISBN in the dataframe
@@ -67,6 +468,9 @@ class LibraryManager:
             index: ignored (kept for compatibility)
             book_data: tuple of (isbn, title, author, publisher, year, signature, description, keywords)
             original_isbn: the original ISBN to use for lookup (if user changed ISBN)
+        
+        Returns:
+            the updated record as a tuple (like get_all_records rows)
         """
         isbn, title, author, publisher, year, signature, description, keywords = book_data
         
@@ -74,20 +478,28 @@ class LibraryManager:
         lookup_isbn = original_isbn if original_isbn else isbn
         
         # Find the row with matching ISBN
-        isbn_match = self.df[self.df['ISBN'].astype(str).str.strip() == str(lookup_isbn).strip()]
+        pos = self.get_index_by_isbn(lookup_isbn)
         
-        if isbn_match.empty:
+        if pos is None:
             raise ValueError(f"Book with ISBN '{lookup_isbn}' not found")
         
         # Get the actual index of the matched row
-        actual_index = isbn_match.index[0]
+        actual_index = self.df.index[pos]
         
         # Check for duplicate signature on OTHER records
+        signature_counts = self._get_signature_counts()
+        old_signature = self.df.at[actual_index, 'Signature']
         if signature and not pd.isna(signature):
-            existing_sig = self.df[(self.df['Signature'] == signature) & (self.df.index != actual_index)]
-            if not existing_sig.empty:
+            others = signature_counts[signature] - (1 if old_signature == signature else 0)
+            if others:
                 raise ValueError(f"Signature '{signature}' already exists")
         
+        # Nothing to update or save if the record is unchanged; compare as text, since the
+        # dialog gives strings while values read from the file can be numbers (ISBN)
+        old_row = self._as_record(self.df.loc[actual_index, self.COLUMNS])
+        if tuple(map(str, old_row)) == tuple(map(str, self._as_record(book_data))):
+            return old_row
+        
         # Update all fields
         self.df.at[actual_index, 'ISBN'] = isbn
         self.df.at[actual_index, 'Title'] = title
@@ -98,59 +510,193 @@ class LibraryManager:
         self.df.at[actual_index, 'Description'] = description
         self.df.at[actual_index, 'Keywords'] = keywords
         
+        self._discard_signature(old_signature)
+        if signature:
+            signature_counts[signature] += 1
+        
+        # Keep the caches, just replace the changed row
+        row = self._as_record(self.df.loc[actual_index, self.COLUMNS])
+        self._cache_replace_row(pos, old_row, row)
         self.save_data()
+        return row
     
     def delete_record(self, index):
         """Delete a book record"""
-        actual_index = self.df.index[index]
-        self.df = self.df.drop(actual_index)
+        self.delete_records([index])
+    
+    def delete_records(self, indices):
+        """Delete several book records by position, saving the file only once
+        
+        Returns:
+            the deleted records as tuples (like get_all_records rows)
+        """
+        indices = sorted(set(indices))
+        if not indices:
+            return []
+        records = self._get_records()
+        deleted = [records[i] for i in indices]
+        
+        actual_indices = self.df.index[indices]
+        for signature in self.df.loc[actual_indices, 'Signature']:
+            self._discard_signature(signature)
+        self.df = self.df.drop(actual_indices)
         self.df = self.df.reset_index(drop=True)
+        
+        # Keep the caches, minus the deleted rows
+        self._cache_delete_rows(indices)
         self.save_data()
+        return deleted
     
-    def filter_records(self, filters):
-        """Filter records based on criteria"""
-        result = self.df.copy()
+    def _normalize_filters(self, filters):
+        """Turn a filter dict into a hashable tuple of (column, lowercased needles) pairs"""
+        query = []
+        for key, col in self.FILTER_COLUMNS.items():
+            if filters.get(key):
+                query.append((col, (filters[key].lower(),)))
         
-        if filters.get('isbn'):
-            result = result[result['ISBN'].astype(str).str.contains(filters['isbn'], case=False, na=False)]
+        if filters.get('keywords'):
+            # Keywords can be comma-separated; a record must match all of them
+            keywords = [kw.strip().lower() for kw in filters['keywords'].split(',')]
+            keywords = tuple(kw for kw in keywords if kw)
+            if keywords:
+                query.append(('Keywords', keywords))
         
-        if filters.get('title'):
-            result = result[result['Title'].astype(str).str.contains(filters['title'], case=False, na=False)]
+        return tuple(query)
+    
+    @staticmethod
+    def _refines(query, previous):
+        """Check if every record matching query is guaranteed to match previous
         
-        if filters.get('author'):
-            result = result[result['Author'].astype(str).str.contains(filters['author'], case=False, na=False)]
+        Holds when each needle of previous is a substring of some needle
+        searched in the same column by query (e.g. 'his' -> 'history').
+        """
+        needles = dict(query)
+        for col, prev_needles in previous:
+            if col not in needles:
+                return False
+            if not all(any(p in n for n in needles[col]) for p in prev_needles):
+                return False
+        return True
+    
+    def _keyword_rows(self, keywords):
+        """Get the positions of rows whose Keywords contain every one of the given terms
         
-        if filters.get('publisher'):
-            result = result[result['Publisher'].astype(str).str.contains(filters['publisher'], case=False, na=False)]
+        A term can't contain a comma, so it matches a cell exactly when it is a
+        substring of one of the cell's tokens. Only the distinct tokens are scanned.
+        """
+        index = self._get_keyword_index()
+        rows = None
+        for kw in keywords:
+            postings = [token_rows for token, token_rows in index.items() if kw in token]
+            if postings:
+                matched = np.unique(np.concatenate(postings))
+            else:
+                matched = np.empty(0, dtype=np.intp)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+    
+    def _trigram_rows(self, col, needle):
+        """Get the positions of rows that contain every trigram of needle (a superset of the matches)"""
+        index = self._trigrams[col]
+        postings = [index.get(gram) for gram in self._trigrams_of(needle)]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.intp)
         
-        if filters.get('year'):
-            result = result[result['Year'].astype(str).str.contains(filters['year'], case=False, na=False)]
+        # Intersect the smallest posting lists first
+        postings.sort(key=len)
+        rows = postings[0]
+        for p in postings[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, p, assume_unique=True)
+        return rows
+    
+    def _match_rows(self, query):
+        """Get the positions of rows matching a normalized query"""
+        if self._last_query is not None and self._refines(query, self._last_query[0]):
+            # Narrower query: only the previous matches can still match
+            rows = self._last_query[1]
+        else:
+            rows = np.arange(len(self.df))
         
-        if filters.get('signature'):
-            result = result[result['Signature'].astype(str).str.contains(filters['signature'], case=False, na=False)]
+        # Keywords go through the inverted index first to shrink the candidate set
+        keywords = dict(query).get('Keywords')
+        if keywords:
+            rows = np.intersect1d(rows, self._keyword_rows(keywords), assume_unique=True)
         
-        if filters.get('keywords'):
-            # Keywords can be comma-separated; match any of them
-            keywords = filters['keywords'].split(',')
-            for kw in keywords:
-                kw = kw.strip()
-                if kw:
-                    result = result[result['Keywords'].astype(str).str.contains(kw, case=False, na=False)]
+        lower = self._get_lower()
+        for col, needles in query:
+            if col == 'Keywords':
+                continue
+            needle = needles[0]
+            if col in self.LOW_CARDINALITY_COLUMNS:
+                codes, uniques = self._get_factorized(col)
+                if len(uniques) < len(rows):
+                    # Test each distinct value once, then look the rows up by code
+                    hit = np.fromiter((needle in u for u in uniques), dtype=bool, count=len(uniques))
+                    rows = rows[hit[codes[rows]]]
+                    continue
+            if len(needle) >= 3 and len(rows) >= self.TRIGRAM_MIN_ROWS:
+                if col in self._trigrams:
+                    rows = np.intersect1d(rows, self._trigram_rows(col, needle), assume_unique=True)
+                elif len(rows) >= self.TRIGRAM_BUILD_FRACTION * len(self.df):
+                    # Scan this time; the index is built in the background for later searches
+                    self._trigrams_wanted.add(col)
+            # Verify the remaining candidates with an exact substring test
+            # (rows is sorted and unique, so full length means every row: skip the gather copy)
+            arr = lower[col]
+            if len(rows) < len(arr):
+                arr = arr[rows]
+            keep = np.fromiter((needle in s for s in arr), dtype=bool, count=len(arr))
+            rows = rows[keep]
+        return rows
+    
+    def filter_records(self, filters):
+        """Filter records based on criteria (case-insensitive substring match)"""
+        query = self._normalize_filters(filters)
+        
+        rows = self._filter_cache.get(query)
+        if rows is None:
+            rows = self._match_rows(query)
+            self._filter_cache[query] = rows
+            if len(self._filter_cache) > self.FILTER_CACHE_SIZE:
+                self._filter_cache.popitem(last=False)
+        else:
+            self._filter_cache.move_to_end(query)
+        self._last_query = (query, rows)
         
-        return [tuple(row) for row in result.values]
+        records = self._get_records()
+        return [records[i] for i in rows]
+    
+    def record_matches(self, record, filters):
+        """Check if a single record tuple matches the filters, like filter_records would"""
+        cells = self._search_cells(record)
+        # A keyword term has no commas, so it is in one of the cell's tokens exactly when it is in the cell
+        return all(all(needle in cells[col] for needle in needles)
+                   for col, needles in self._normalize_filters(filters))
+    
+    def read_import_file(self, file_path):
+        """Parse an import file ahead of check_import_conflicts/import_csv_merge, which reuse the parse
+        
+        Only reads the file and never touches self.df, so it is safe to run off the main thread.
+        """
+        try:
+            self._read_import_csv(file_path)
+        except Exception as e:
+            raise ValueError(f"Error reading import file: {str(e)}")
     
     def check_import_conflicts(self, file_path):
         """Check for Signature conflicts when importing (returns list of conflicting Signatures)"""
         try:
-            df_import = pd.read_csv(file_path, sep=';', dtype={'Signature': 'object', 'Year': 'object'})
+            df_import = self._read_import_csv(file_path)
             # Validate columns
             missing_cols = set(self.COLUMNS) - set(df_import.columns)
             if missing_cols:
                 raise ValueError(f"Missing required columns: {missing_cols}")
             
             # Check for duplicate Signatures (only non-null signatures)
-            current_sigs = set(self.df[self.df['Signature'].notna()]['Signature'].astype(str).str.strip())
-            import_sigs = set(df_import[df_import['Signature'].notna()]['Signature'].astype(str).str.strip())
+            current_sigs = set(self.df['Signature'].dropna().astype(str).str.strip())
+            import_sigs = set(df_import['Signature'].dropna().astype(str).str.strip())
             conflicts = list(current_sigs & import_sigs)
             return conflicts
         except Exception as e:
@@ -159,37 +705,43 @@ class LibraryManager:
     def import_csv_merge(self, file_path):
         """Import data from CSV file and merge with existing data (skip records with duplicate Signatures)"""
         try:
-            df_import = pd.read_csv(file_path, sep=';', dtype={'Signature': 'object', 'Year': 'object'})
+            df_import = self._read_import_csv(file_path)
             # Validate columns
             missing_cols = set(self.COLUMNS) - set(df_import.columns)
             if missing_cols:
                 raise ValueError(f"Missing required columns: {missing_cols}")
             
-            # Reorder columns to match expected order
-            df_import = df_import[self.COLUMNS]
-            
             # Get current non-null Signatures
-            current_sigs = set(self.df[self.df['Signature'].notna()]['Signature'].astype(str).str.strip())
+            current_sigs = set(self.df['Signature'].dropna().astype(str).str.strip())
             
-            # Filter out records with duplicate Signatures (only check if Signature is not null)
-            new_records = df_import[
-                ~(
-                    (df_import['Signature'].notna()) & 
-                    (df_import['Signature'].astype(str).str.strip().isin(current_sigs))
-                )
-            ]
+            # Filter out records with duplicate Signatures (only check if Signature is not null),
+            # selecting rows and reordering columns in a single step
+            duplicate = (
+                (df_import['Signature'].notna()) & 
+                (df_import['Signature'].astype(str).str.strip().isin(current_sigs))
+            )
+            new_records = df_import.loc[~duplicate, self.COLUMNS]
             
             # Append new records to existing dataframe
             if len(new_records) > 0:
                 self.df = pd.concat([self.df, new_records], ignore_index=True)
+                self._signature_counts = None
+                self._invalidate_cache()
                 self.save_data()
         except Exception as e:
             raise ValueError(f"Error importing CSV: {str(e)}")
+        finally:
+            # The parsed file is no longer needed once the merge is done (or has failed)
+            self.discard_import_cache()
+    
+    def discard_import_cache(self):
+        """Drop the parsed import file kept by read_import_file/check_import_conflicts"""
+        self._import_cache = None
     
     def import_csv(self, file_path):
         """Import data from CSV file (semicolon-separated)"""
         try:
-            df = pd.read_csv(file_path, sep=';', dtype={'Signature': 'object', 'Year': 'object'})
+            df = self._read_csv(file_path)
             # Validate columns
             missing_cols = set(self.COLUMNS) - set(df.columns)
             if missing_cols:
@@ -198,6 +750,8 @@ class LibraryManager:
             # Reorder columns to match expected order
             df = df[self.COLUMNS]
             self.df = df
+            self._signature_counts = None
+            self._invalidate_cache()
             self.save_data()
         except Exception as e:
             raise Exception(f"Failed to import CSV: {str(e)}")
@@ -6,9 +6,12 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import pandas as pd
+from ttkbootstrap.toast import ToastNotification
+import numpy as np
 import os
 import sys
+import threading
+from collections import Counter
 from pathlib import Path
 from library_manager import LibraryManager
 
@@ -23,8 +26,27 @@ else:
 
 DATA_FILE = APP_DIR / 'library.csv'
 
+# Window icon (checked once at startup), or None if the file is missing
+ICON_FILE = APP_DIR / 'icon' / 'msf-favicon.ico'
+ICON_PATH = str(ICON_FILE) if ICON_FILE.exists() else None
+
 
 class LibraryManagerGUI:
+    # Rows added to the table at a time; more are added when scrolling reaches the end
+    PAGE_SIZE = 200
+    
+    # Delay after the last keystroke in a filter field before the filter is applied
+    FILTER_DELAY_MS = 150
+    
+    # Columns sorted by number instead of text (Year); non-numeric values sort first
+    NUMERIC_SORT_COLUMNS = (4,)
+    
+    # How long success notifications stay on screen
+    TOAST_DURATION_MS = 2000
+    
+    # How often the main loop checks whether background file work has finished
+    BACKGROUND_POLL_MS = 50
+    
     def __init__(self, root):
         self.root = root
         self.root.title('MSF Library Manager')
@@ -38,6 +60,12 @@ class LibraryManagerGUI:
         self.setup_ui()
         self.refresh_table()
         
+        # Book dialog, built on first use by show_book_dialog
+        self._book_dialog = None
+        
+        # Whether a search index is being built on a worker thread
+        self._index_building = False
+        
         # Bind copy shortcut
         self.root.bind('<Control-c>', self.copy_selection)
     
@@ -99,6 +127,12 @@ class LibraryManagerGUI:
         self.filter_keywords = ttk.Entry(search_row2, width=30)
         self.filter_keywords.pack(side='left', padx=(0, 15), fill='x', expand=True)
         
+        # Filter as you type (debounced, so a burst of keystrokes only filters once)
+        self._filter_after_id = None
+        for entry in (self.filter_isbn, self.filter_title, self.filter_author, self.filter_publisher,
+                      self.filter_year, self.filter_signature, self.filter_keywords):
+            entry.bind('<KeyRelease>', self.schedule_filter)
+        
         # Row 3 - Action buttons
         button_row = ttk.Frame(filter_frame)
         button_row.pack(fill='x', pady=(10, 0))
@@ -136,7 +170,7 @@ class LibraryManagerGUI:
         self.import_btn.pack(side='left', padx=2)
         
         # Always visible buttons
-        ttk.Button(action_frame, text='🔄 Reload', command=self.refresh_table, bootstyle='secondary').pack(side='left', padx=2)
+        ttk.Button(action_frame, text='🔄 Reload', command=self.reload_data, bootstyle='secondary').pack(side='left', padx=2)
         ttk.Button(action_frame, text='⊗ Exit', command=self.root.quit, bootstyle='secondary').pack(side='right', padx=2)
         
         # Initialize edit mode (hide buttons by default)
@@ -148,7 +182,8 @@ class LibraryManagerGUI:
         
         # Treeview
         columns = ('ISBN', 'Title', 'Author', 'Publisher', 'Year', 'Signature', 'Description', 'Keywords')
-        self.tree = ttk.Treeview(table_frame, columns=columns, height=20, show='headings')
+        # Multi-select with Shift+Click for range selection
+        self.tree = ttk.Treeview(table_frame, columns=columns, height=20, show='headings', selectmode='extended')
         
         # Configure Treeview font size and rowheight for better readability
         style = ttk.Style()
@@ -159,28 +194,39 @@ class LibraryManagerGUI:
         widths = [90, 180, 130, 130, 60, 110, 220, 180]
         self.sort_column = None
         self.sort_reverse = False
+        # Sort keys per column, valid while current_data is _sort_keys_data
+        self._sort_keys_data = None
+        self._sort_keys = {}
         
         for col, width in zip(columns, widths):
             self.tree.column(col, width=width, anchor='w')
             self.tree.heading(col, text=col, command=lambda c=col: self.sort_by_column(c))
         
         # Scrollbars
-        vsb = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
+        self.vsb = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
         hsb = ttk.Scrollbar(table_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscroll=vsb.set, xscroll=hsb.set)
+        self.tree.configure(yscroll=self.on_tree_yscroll, xscroll=hsb.set)
         
         self.tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
+        self.vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
         
-        # Multi-select with Shift+Click for range selection
-        self.tree.configure(selectmode='extended')
         self.last_selected_item = None
         self.tree.bind('<Button-1>', self.on_tree_click)
         self.tree.bind('<Double-Button-1>', self.on_tree_double_click)  # Double-click to view book info
         
+        # Tree items currently shown, so refresh_table only touches rows that changed
+        self._item_by_key = {}
+        self._row_by_item = {}
+        # Shown items in display order and each item's position (also its index in current_data)
+        self._items = []
+        self._index_by_item = {}
+        # Only the first _render_limit rows of current_data are put in the tree
+        self._render_limit = self.PAGE_SIZE
+        self._page_pending = False
+        
         # Status bar
         self.status_var = tk.StringVar(value='Ready')
         status_bar = ttk.Label(action_frame, textvariable=self.status_var)
@@ -188,15 +234,80 @@ class LibraryManagerGUI:
         
         self.update_status()
     
+    @staticmethod
+    def _row_keys(rows):
+        """Key each row by ISBN and occurrence number, so duplicate ISBNs stay distinct"""
+        seen = {}
+        keys = []
+        for row in rows:
+            isbn = str(row[0]).strip()
+            n = seen.get(isbn, 0)
+            seen[isbn] = n + 1
+            keys.append((isbn, n))
+        return keys
+    
     def refresh_table(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Sync the tree with self.current_data, only deleting/inserting rows that changed
+        
+        Only the first _render_limit rows are inserted; on_tree_yscroll raises the
+        limit when the user scrolls to the end, so large libraries stay responsive.
+        """
+        rows = self.current_data[:self._render_limit]
+        keys = self._row_keys(rows)
+        wanted = set(keys)
+        
+        # Delete rows that are no longer shown
+        stale = [key for key in self._item_by_key if key not in wanted]
+        if stale:
+            stale_items = [self._item_by_key.pop(key) for key in stale]
+            for item in stale_items:
+                del self._row_by_item[item]
+            self.tree.delete(*stale_items)
+        
+        # Kept rows only need moving if their relative order changed (e.g. after sorting)
+        kept = [self._item_by_key[key] for key in keys if key in self._item_by_key]
+        reorder = list(self.tree.get_children()) != kept
+        
+        # Insert through tk.call directly; Treeview.insert re-formats its options for every row
+        tk_call, tree_path = self.tree.tk.call, self.tree._w
+        items = []
+        for pos, (key, row) in enumerate(zip(keys, rows)):
+            item = self._item_by_key.get(key)
+            if item is None:
+                item = tk_call(tree_path, 'insert', '', pos, '-values', row)
+                self._item_by_key[key] = item
+            else:
+                if self._row_by_item[item] != row:
+                    self.tree.item(item, values=row)
+                if reorder:
+                    self.tree.move(item, '', pos)
+            self._row_by_item[item] = row
+            items.append(item)
         
-        for i, row in enumerate(self.current_data):
-            self.tree.insert('', 'end', values=row)
+        self._items = items
+        self._index_by_item = {item: pos for pos, item in enumerate(items)}
         
         self.update_status()
     
+    def on_tree_yscroll(self, first, last):
+        """Update the scrollbar and load the next page of rows once the end is reached"""
+        self.vsb.set(first, last)
+        if float(last) >= 1.0 and self._render_limit < len(self.current_data) and not self._page_pending:
+            self._page_pending = True
+            self.root.after_idle(self.load_next_page)
+    
+    def load_next_page(self):
+        """Add the next PAGE_SIZE rows of current_data to the table"""
+        self._page_pending = False
+        self._render_limit += self.PAGE_SIZE
+        self.refresh_table()
+    
+    def reload_data(self):
+        """Re-read the library file if it changed on disk, then refresh the table"""
+        if self.manager.reload():
+            self.current_data = self.manager.filter_records(self.current_filter) if self.current_filter else self.manager.get_all_records()
+        self.refresh_table()
+    
     def update_status(self):
         total = len(self.manager.df)
         displayed = len(self.current_data)
@@ -220,28 +331,13 @@ class LibraryManagerGUI:
         
         # Check if Shift is held (range select)
         if event.state & 0x1:  # Shift key flag
-            if self.last_selected_item:
-                # Get all items
-                all_items = self.tree.get_children()
-                
-                # Get indices
-                start_idx = all_items.index(self.last_selected_item)
-                end_idx = all_items.index(item)
-                
-                # Ensure start is before end
-                if start_idx > end_idx:
-                    start_idx, end_idx = end_idx, start_idx
+            if self.last_selected_item in self._index_by_item:
+                # Get indices (ensure start is before end)
+                start_idx, end_idx = sorted((self._index_by_item[self.last_selected_item], self._index_by_item[item]))
                 
                 # Select range (keep existing selection, add new range)
-                current_selection = list(self.tree.selection())
-                range_items = all_items[start_idx:end_idx + 1]
-                
-                # Combine: keep existing selections + add new range
-                for i in range_items:
-                    if i not in current_selection:
-                        current_selection.append(i)
-                
-                self.tree.selection_set(current_selection)
+                range_items = self._items[start_idx:end_idx + 1]
+                self.tree.selection_set(list(set(self.tree.selection()) | set(range_items)))
                 self.last_selected_item = None
             else:
                 self.last_selected_item = item
@@ -267,6 +363,7 @@ class LibraryManagerGUI:
         """Sort table by clicked column (toggle ascending/descending)"""
         columns = ('ISBN', 'Title', 'Author', 'Publisher', 'Year', 'Signature', 'Description', 'Keywords')
         col_index = columns.index(col)
+        keys = self._get_sort_keys(col_index)
         
         # Toggle sort direction if same column, else new column
         if self.sort_column == col_index:
@@ -284,11 +381,60 @@ class LibraryManagerGUI:
                 self.tree.heading(c, text=c)
         
         # Sort data
-        self.current_data = sorted(self.current_data, key=lambda x: str(x[col_index]).lower(), reverse=self.sort_reverse)
+        if self.sort_reverse:
+            # Sort the reversed keys and flip back, so equal rows keep their order like sorted(reverse=True)
+            order = len(keys) - 1 - np.argsort(keys[::-1], kind='stable')[::-1]
+        else:
+            order = np.argsort(keys, kind='stable')
+        self.current_data = [self.current_data[i] for i in order]
+        
+        # Keep the cached keys valid for the reordered data
+        self._sort_keys = {c: k[order] for c, k in self._sort_keys.items()}
+        self._sort_keys_data = self.current_data
         self.refresh_table()
     
-    def apply_filter(self):
-        self.current_filter = {
+    @staticmethod
+    def _numeric_key(value):
+        """Sort key of a numeric column value, -1 if it is not a number that fits in int64"""
+        # isdigit() accepts characters like '²' that int() rejects; 18 digits always fit in int64
+        if value.isdecimal() and len(value) <= 18:
+            return int(value)
+        return -1
+    
+    def _get_sort_keys(self, col_index):
+        """Get the sort keys of a column of current_data (cached until the data changes)"""
+        if self._sort_keys_data is not self.current_data:
+            self._sort_keys_data = self.current_data
+            self._sort_keys = {}
+        keys = self._sort_keys.get(col_index)
+        if keys is None:
+            if col_index in self.NUMERIC_SORT_COLUMNS:
+                values = (str(row[col_index]).strip() for row in self.current_data)
+                keys = np.fromiter((self._numeric_key(v) for v in values), dtype=np.int64, count=len(self.current_data))
+            else:
+                keys = np.array([str(row[col_index]).lower() for row in self.current_data], dtype=object)
+            self._sort_keys[col_index] = keys
+        return keys
+    
+    def schedule_filter(self, event=None):
+        """Apply the filter once typing has paused for FILTER_DELAY_MS"""
+        if self._filter_after_id:
+            self.root.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.root.after(self.FILTER_DELAY_MS, lambda: self.apply_filter(only_if_changed=True))
+    
+    def apply_filter(self, only_if_changed=False):
+        """Filter the table by the filter fields
+        
+        With only_if_changed (used while typing), keys that leave the fields as they
+        were (Tab, Shift, arrows) don't refilter, so the table keeps its loaded rows
+        and scroll position.
+        """
+        # Drop a pending delayed filter; this call already covers it
+        if self._filter_after_id:
+            self.root.after_cancel(self._filter_after_id)
+            self._filter_after_id = None
+        
+        new_filter = {
             'isbn': self.filter_isbn.get().strip(),
             'title': self.filter_title.get().strip(),
             'author': self.filter_author.get().strip(),
@@ -297,10 +443,37 @@ class LibraryManagerGUI:
             'signature': self.filter_signature.get().strip(),
             'keywords': self.filter_keywords.get().strip(),
         }
+        # Empty fields match everything, so {} (no filter yet) equals all fields empty
+        if only_if_changed and {k: v for k, v in new_filter.items() if v} == {k: v for k, v in self.current_filter.items() if v}:
+            return
+        self.current_filter = new_filter
         self.current_data = self.manager.filter_records(self.current_filter)
+        self._render_limit = self.PAGE_SIZE
         self.refresh_table()
+        self._build_search_indexes()
     
-    def clear_filter(self):
+    def _build_search_indexes(self):
+        """Build the search indexes filtering asked for on a worker thread, one at a time
+        
+        Filters scan the column until its index is ready, so a first search never waits for the build.
+        """
+        if self._index_building:
+            return
+        job = self.manager.trigram_build_job()
+        if job is None:
+            return
+        self._index_building = True
+        
+        def done(result, error):
+            self._index_building = False
+            if result is not None:
+                self.manager.install_trigram_index(result)
+            self._build_search_indexes()
+        
+        self.run_in_background(job, done)
+    
+    def _clear_filter_entries(self):
+        """Empty all filter fields (without refreshing the table)"""
         self.filter_isbn.delete(0, 'end')
         self.filter_title.delete(0, 'end')
         self.filter_author.delete(0, 'end')
@@ -308,8 +481,12 @@ class LibraryManagerGUI:
         self.filter_year.delete(0, 'end')
         self.filter_signature.delete(0, 'end')
         self.filter_keywords.delete(0, 'end')
+    
+    def clear_filter(self):
+        self._clear_filter_entries()
         self.current_filter = {}
         self.current_data = self.manager.get_all_records()
+        self._render_limit = self.PAGE_SIZE
         self.refresh_table()
     
     def export_csv(self):
@@ -323,12 +500,47 @@ class LibraryManagerGUI:
         )
         
         if file_path:
+            # Write a snapshot of the shown rows on a worker thread
+            records = list(self.current_data)
+            
+            def done(result, error):
+                self.update_status()
+                if error:
+                    messagebox.showerror('Export Error', f'Error exporting: {str(error)}')
+                else:
+                    self.notify('Export', f'✓ Exported {len(records)} records')
+            
+            self.status_var.set('Exporting...')
+            self.run_in_background(lambda: self.manager.export_records(records, file_path), done)
+    
+    def notify(self, title, message):
+        """Show a success message as a toast that closes itself, without blocking the window"""
+        ToastNotification(title=title, message=message, duration=self.TOAST_DURATION_MS, bootstyle='success').show_toast()
+    
+    def run_in_background(self, work, on_done):
+        """Run work() on a worker thread, then call on_done(result, error) on the Tk thread
+        
+        Tk must only be used from the main thread, so instead of the worker
+        calling back, the main loop polls every BACKGROUND_POLL_MS until it is done.
+        """
+        outcome = {}
+        
+        def worker():
             try:
-                df = pd.DataFrame(self.current_data, columns=['ISBN', 'Title', 'Author', 'Publisher', 'Year', 'Signature', 'Description', 'Keywords'])
-                df.to_csv(file_path, sep=';', index=False)
-                messagebox.showinfo('Export', f'✓ Exported {len(self.current_data)} records')
+                outcome['result'] = work()
             except Exception as e:
-                messagebox.showerror('Export Error', f'Error exporting: {str(e)}')
+                outcome['error'] = e
+        
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(self.BACKGROUND_POLL_MS, poll)
+            else:
+                on_done(outcome.get('result'), outcome.get('error'))
+        
+        self.root.after(self.BACKGROUND_POLL_MS, poll)
     
     def toggle_edit_mode(self):
         """Show or hide edit/delete/import buttons based on checkbox"""
@@ -341,29 +553,22 @@ class LibraryManagerGUI:
             self.edit_buttons_frame.pack_forget()
     
     def add_book(self):
-        book = self.show_book_dialog()
+        self.show_book_dialog(on_complete=self._finish_add_book)
+    
+    def _finish_add_book(self, book):
+        """Add the book entered in the dialog"""
         if book:
             try:
-                self.manager.add_record(book)
-                # Give file time to write
-                import time
-                time.sleep(0.2)
+                row = self.manager.add_record(book)
                 
-                # Force reload manager from disk
-                self.manager = LibraryManager(str(DATA_FILE))
-                
-                # Refresh table with all data (clear filters to show the new book)
-                self.current_filter = {}
-                self.filter_isbn.delete(0, 'end')
-                self.filter_title.delete(0, 'end')
-                self.filter_author.delete(0, 'end')
-                self.filter_publisher.delete(0, 'end')
-                self.filter_year.delete(0, 'end')
-                self.filter_signature.delete(0, 'end')
-                self.filter_keywords.delete(0, 'end')
-                self.current_data = self.manager.get_all_records()
-                self.refresh_table()
-                messagebox.showinfo('Success', '✓ Book added successfully')
+                if any(self.current_filter.values()):
+                    # Refresh table with all data (clear filters to show the new book)
+                    self.clear_filter()
+                else:
+                    # All books are already shown; just add the new one at the end
+                    self.current_data = self.current_data + [row]
+                    self.refresh_table()
+                self.notify('Success', '✓ Book added successfully')
             except Exception as e:
                 messagebox.showerror('Error', f'Error adding book: {str(e)}')
     
@@ -379,21 +584,31 @@ class LibraryManagerGUI:
         book_data = tuple(tree_values)  # This is the current data shown in the row
         original_isbn = book_data[0]  # Save the ORIGINAL ISBN before editing
         
-        book = self.show_book_dialog(book_data)
-        
+        self.show_book_dialog(book_data, on_complete=lambda book: self._finish_edit_book(item, original_isbn, book))
+    
+    def _finish_edit_book(self, item, original_isbn, book):
+        """Save the changes made in the dialog to the book shown in the given tree item"""
         if book:
             try:
                 # Update the record - pass the original ISBN in case the user changed it
-                self.manager.update_record(0, book, original_isbn=original_isbn)
-                # Give file time to write
-                import time
-                time.sleep(0.2)
+                old_row = self.manager.get_by_isbn(original_isbn)
+                row = self.manager.update_record(0, book, original_isbn=original_isbn)
                 
-                # Force reload from disk
-                self.manager = LibraryManager(str(DATA_FILE))
-                self.current_data = self.manager.filter_records(self.current_filter) if self.current_filter else self.manager.get_all_records()
+                # The item may be gone if the table changed while the dialog was open
+                index = self._index_by_item.get(item)
+                if index is not None and self.current_data[index] == old_row:
+                    # Replace just the edited row (a new list, so cached sort keys aren't reused),
+                    # or drop it if the edit means it no longer matches the active filter
+                    self.current_data = list(self.current_data)
+                    if not self.current_filter or self.manager.record_matches(row, self.current_filter):
+                        self.current_data[index] = row
+                    else:
+                        del self.current_data[index]
+                else:
+                    # The row is no longer shown, or shares its ISBN with the book that was updated instead
+                    self.current_data = self.manager.filter_records(self.current_filter) if self.current_filter else self.manager.get_all_records()
                 self.refresh_table()
-                messagebox.showinfo('Success', '✓ Book updated successfully')
+                self.notify('Success', '✓ Book updated successfully')
             except Exception as e:
                 messagebox.showerror('Error', f'Error updating book: {str(e)}')
     
@@ -408,27 +623,31 @@ class LibraryManagerGUI:
                 # Get the actual ISBNs to delete (first column is ISBN)
                 books_to_delete = []
                 for item in selection:
-                    index = self.tree.index(item)
+                    index = self._index_by_item[item]
                     isbn = self.current_data[index][0]  # ISBN is first column
                     books_to_delete.append(isbn)
                 
-                # Delete all matching ISBNs in a single pass (more efficient)
-                indices_to_delete = []
+                # Look up each ISBN's row in the manager's ISBN index
+                indices_to_delete = set()
                 for isbn in books_to_delete:
-                    for i, row in enumerate(self.manager.df.values):
-                        if str(row[0]).strip() == str(isbn).strip():
-                            indices_to_delete.append(i)
-                            break
+                    index = self.manager.get_index_by_isbn(isbn)
+                    if index is not None:
+                        indices_to_delete.add(index)
                 
-                # Sort indices in reverse order so we don't mess up indices when deleting
-                for i in sorted(indices_to_delete, reverse=True):
-                    self.manager.delete_record(i)
+                # Delete all rows in one go (the file is only saved once)
+                deleted_rows = self.manager.delete_records(indices_to_delete)
+                deleted = Counter(deleted_rows)
                 
-                # Reload manager from disk
-                self.manager = LibraryManager(str(DATA_FILE))
-                self.current_data = self.manager.filter_records(self.current_filter) if self.current_filter else self.manager.get_all_records()
+                # Drop the deleted records from the shown rows instead of fetching them again
+                rows = []
+                for row in self.current_data:
+                    if deleted[row]:
+                        deleted[row] -= 1
+                    else:
+                        rows.append(row)
+                self.current_data = rows
                 self.refresh_table()
-                messagebox.showinfo('Success', f'✓ Deleted {len(books_to_delete)} book(s)')
+                self.notify('Success', f'✓ Deleted {len(deleted_rows)} book(s)')
             except Exception as e:
                 messagebox.showerror('Error', f'Error deleting book: {str(e)}')
     
@@ -438,37 +657,53 @@ class LibraryManagerGUI:
         )
         
         if file_path:
-            try:
-                # Check for conflicts before importing (based on Signature field)
-                conflicts = self.manager.check_import_conflicts(file_path)
+            # Parse the file on a worker thread so the window stays responsive; the
+            # conflicts are checked afterwards on the Tk thread, since edits change the data
+            self.import_btn.configure(state='disabled')
+            self.status_var.set('Reading import file...')
+            self.run_in_background(
+                lambda: self.manager.read_import_file(file_path),
+                lambda result, error: self._finish_import(file_path, error)
+            )
+    
+    def _finish_import(self, file_path, error):
+        """Ask about conflicts and merge the import once the file has been read"""
+        self.import_btn.configure(state='normal')
+        self.update_status()
+        try:
+            if error:
+                raise error
+            
+            # Check for conflicts before importing (based on Signature field)
+            conflicts = self.manager.check_import_conflicts(file_path)
+            if conflicts:
+                # Show conflicts and ask user
+                conflict_text = f"Found {len(conflicts)} duplicate Signature(s):\n\n"
+                for sig in conflicts[:10]:  # Show first 10
+                    conflict_text += f"  • {sig}\n"
+                if len(conflicts) > 10:
+                    conflict_text += f"  ... and {len(conflicts) - 10} more"
                 
-                if conflicts:
-                    # Show conflicts and ask user
-                    conflict_text = f"Found {len(conflicts)} duplicate Signature(s):\n\n"
-                    for sig in conflicts[:10]:  # Show first 10
-                        conflict_text += f"  • {sig}\n"
-                    if len(conflicts) > 10:
-                        conflict_text += f"  ... and {len(conflicts) - 10} more"
-                    
-                    conflict_text += "\n\nDo you want to:\n• YES: Add only new records (skip duplicates)\n• NO: Cancel import"
-                    
-                    result = messagebox.askyesno('Import Conflicts', conflict_text)
-                    if not result:
-                        return  # User cancelled
-                    
-                    # Import only new records
-                    self.manager.import_csv_merge(file_path)
-                else:
-                    # No conflicts - safe to add all
-                    self.manager.import_csv_merge(file_path)
+                conflict_text += "\n\nDo you want to:\n• YES: Add only new records (skip duplicates)\n• NO: Cancel import"
                 
-                self.current_data = self.manager.get_all_records()
-                self.current_filter = {}
-                self.clear_filter()
-                self.refresh_table()
-                messagebox.showinfo('Import', f'✓ Successfully added new records to library')
-            except Exception as e:
-                messagebox.showerror('Import Error', f'Error importing CSV: {str(e)}')
+                result = messagebox.askyesno('Import Conflicts', conflict_text)
+                if not result:
+                    return  # User cancelled
+                
+                # Import only new records
+                self.manager.import_csv_merge(file_path)
+            else:
+                # No conflicts - safe to add all
+                self.manager.import_csv_merge(file_path)
+            
+            # Show all records (clear_filter refreshes the table)
+            self.clear_filter()
+            self.notify('Import', f'✓ Successfully added new records to library')
+        except Exception as e:
+            messagebox.showerror('Import Error', f'Error importing CSV: {str(e)}')
+        finally:
+            # Don't keep the parsed file around if the import was cancelled or failed
+            self.manager.discard_import_cache()
     
     def copy_selection(self, event=None):
         """Copy selected rows to clipboard (tab-separated)"""
@@ -477,28 +712,19 @@ class LibraryManagerGUI:
             return
         
         try:
-            rows = []
-            for item in selection:
-                index = self.tree.index(item)
-                row = self.current_data[index]
-                rows.append('\t'.join(str(val) for val in row))
-            
-            text = '\n'.join(rows)
+            rows = [self.current_data[self._index_by_item[item]] for item in selection]
+            text = '\n'.join('\t'.join(map(str, row)) for row in rows)
             self.root.clipboard_clear()
             self.root.clipboard_append(text)
             self.root.update()
         except Exception as e:
             messagebox.showerror('Copy Error', f'Error copying: {str(e)}')
     
-    def show_book_dialog(self, book_data=None, read_only=False):
+    def _build_book_dialog(self):
+        """Build the book dialog once (hidden); show_book_dialog fills it in and shows it"""
         # Create a proper Toplevel dialog window with dark theme
         dialog = tk.Toplevel(self.root)
-        
-        # Set title based on mode
-        if read_only:
-            dialog.title('📖 View Book')
-        else:
-            dialog.title('Add Book' if not book_data else 'Edit Book')
+        dialog.withdraw()
         
         dialog.geometry('500x600')
         dialog.configure(bg='#212121')
@@ -509,17 +735,13 @@ class LibraryManagerGUI:
             pass  # Not supported on all systems
         
         # Set dialog icon for taskbar
-        icon_path = APP_DIR / 'icon' / 'msf-favicon.ico'
-        if icon_path.exists():
+        if ICON_PATH:
             try:
-                dialog.iconbitmap(str(icon_path))
+                dialog.iconbitmap(ICON_PATH)
             except:
                 pass  # Icon not available on all systems
         
-        if book_data:
-            isbn, title, author, publisher, year, signature, description, keywords = book_data
-        else:
-            isbn = title = author = publisher = year = signature = description = keywords = ''
+        ui = {'dialog': dialog, 'read_only': False, 'on_complete': None}
         
         # Main container - dark background
         main_frame = tk.Frame(dialog, bg='#212121')
@@ -531,6 +753,18 @@ class LibraryManagerGUI:
         
         entries = {}
         
+        # Make fields read-only in view mode by preventing edits but allowing selection and copy
+        def prevent_edit(event):
+            if not ui['read_only']:
+                return
+            # Allow Ctrl+C (copy)
+            if event.state & 0x4 and event.keysym == 'c':  # Ctrl+C
+                return
+            # Allow Ctrl+A (select all)
+            if event.state & 0x4 and event.keysym == 'a':  # Ctrl+A
+                return
+            return 'break'  # Block all other keys
+        
         # Two-column layout - left side
         cols_frame = tk.Frame(main_frame, bg='#212121')
         cols_frame.pack(fill='x', pady=(0, 15))
@@ -541,7 +775,7 @@ class LibraryManagerGUI:
         right_col = tk.Frame(cols_frame, bg='#212121')
         right_col.pack(side='left', fill='both', expand=True, padx=(10, 0))
         
-        def add_field_to_col(parent, label_text, default_val, field_key):
+        def add_field_to_col(parent, label_text, field_key):
             """Add a field (label + entry) to the given column"""
             field_container = tk.Frame(parent, bg='#212121')
             field_container.pack(fill='x', pady=(0, 10))
@@ -551,34 +785,20 @@ class LibraryManagerGUI:
             
             field = tk.Entry(field_container, width=28, bg='#313131', fg='#e0e0e0', insertbackground='#e0e0e0', border=1, relief='solid',
                             disabledbackground='#313131', disabledforeground='#e0e0e0')
-            field.insert(0, str(default_val))
-            
-            # Make read-only by preventing edits but allowing selection and copy
-            if read_only:
-                def prevent_edit(event):
-                    # Allow Ctrl+C (copy)
-                    if event.state & 0x4 and event.keysym == 'c':  # Ctrl+C
-                        return
-                    # Allow Ctrl+A (select all)
-                    if event.state & 0x4 and event.keysym == 'a':  # Ctrl+A
-                        return
-                    return 'break'  # Block all other keys
-                
-                field.bind('<Key>', prevent_edit)
-            
+            field.bind('<Key>', prevent_edit)
             field.pack(fill='x')
             entries[field_key] = field
             return field
         
         # Left column fields
-        add_field_to_col(left_col, 'ISBN', isbn, 'isbn_entry')
-        add_field_to_col(left_col, 'Title', title, 'title_entry')
-        add_field_to_col(left_col, 'Author', author, 'author_entry')
+        add_field_to_col(left_col, 'ISBN', 'isbn_entry')
+        add_field_to_col(left_col, 'Title', 'title_entry')
+        add_field_to_col(left_col, 'Author', 'author_entry')
         
         # Right column fields
-        add_field_to_col(right_col, 'Publisher', publisher, 'pub_entry')
-        add_field_to_col(right_col, 'Year', year, 'year_entry')
-        add_field_to_col(right_col, 'Signature', signature, 'sig_entry')
+        add_field_to_col(right_col, 'Publisher', 'pub_entry')
+        add_field_to_col(right_col, 'Year', 'year_entry')
+        add_field_to_col(right_col, 'Signature', 'sig_entry')
         
         # Description field (full width)
         desc_label = tk.Label(main_frame, text='Description', font=('Segoe UI', 9, 'bold'), bg='#212121', fg='#e0e0e0')
@@ -586,22 +806,7 @@ class LibraryManagerGUI:
         
         desc_field = tk.Text(main_frame, height=5, wrap='word', font=('Segoe UI', 9), bg='#313131', fg='#e0e0e0', insertbackground='#e0e0e0', border=1, relief='solid',
                             selectbackground='#555555', selectforeground='#e0e0e0')
-        desc_field.insert('1.0', str(description))
-        
-        # Make read-only by preventing edits but allowing selection and copy
-        if read_only:
-            def prevent_desc_edit(event):
-                # Allow Ctrl+C (copy)
-                if event.state & 0x4 and event.keysym == 'c':  # Ctrl+C
-                    return
-                # Allow Ctrl+A (select all)
-                if event.state & 0x4 and event.keysym == 'a':  # Ctrl+A
-                    return
-                return 'break'  # Block all other keys
-            
-            desc_field.bind('<Key>', prevent_desc_edit)
-            desc_field.config(state='normal')  # Keep normal state for selection
-        
+        desc_field.bind('<Key>', prevent_edit)
         desc_field.pack(fill='both', expand=True, pady=(0, 10))
         entries['desc_entry'] = desc_field
         
@@ -611,22 +816,7 @@ class LibraryManagerGUI:
         
         kw_field = tk.Entry(main_frame, bg='#313131', fg='#e0e0e0', insertbackground='#e0e0e0', border=1, relief='solid',
                            disabledbackground='#313131', disabledforeground='#e0e0e0')
-        kw_field.insert(0, str(keywords))
-        
-        # Make read-only by preventing edits but allowing selection and copy
-        if read_only:
-            def prevent_kw_edit(event):
-                # Allow Ctrl+C (copy)
-                if event.state & 0x4 and event.keysym == 'c':  # Ctrl+C
-                    return
-                # Allow Ctrl+A (select all)
-                if event.state & 0x4 and event.keysym == 'a':  # Ctrl+A
-                    return
-                return 'break'  # Block all other keys
-            
-            kw_field.bind('<Key>', prevent_kw_edit)
-            kw_field.config(state='normal')  # Keep normal state for selection
-        
+        kw_field.bind('<Key>', prevent_edit)
         kw_field.pack(fill='x', pady=(0, 15))
         entries['kw_entry'] = kw_field
         
@@ -634,65 +824,96 @@ class LibraryManagerGUI:
         button_frame = tk.Frame(main_frame, bg='#212121')
         button_frame.pack(fill='x', pady=(10, 0))
         
-        result = {'data': None, 'ok': False}
+        # Fields in record order (ISBN ... Keywords), for filling them in and reading them back
+        fields = [entries[key] for key in ('isbn_entry', 'title_entry', 'author_entry', 'pub_entry',
+                                           'year_entry', 'sig_entry', 'desc_entry', 'kw_entry')]
+        ui['fields'] = fields
+        
+        def close():
+            """Hide the dialog for the next use instead of destroying it"""
+            dialog.grab_release()
+            dialog.withdraw()
         
         def save():
             try:
-                result['data'] = (
-                    entries['isbn_entry'].get(),
-                    entries['title_entry'].get(),
-                    entries['author_entry'].get(),
-                    entries['pub_entry'].get(),
-                    entries['year_entry'].get(),
-                    entries['sig_entry'].get(),
-                    entries['desc_entry'].get('1.0', 'end-1c'),
-                    entries['kw_entry'].get()
-                )
-                result['ok'] = True
-                dialog.destroy()
+                book = tuple(field.get('1.0', 'end-1c') if field is desc_field else field.get() for field in fields)
             except Exception as e:
                 import traceback
                 traceback.print_exc()
+                return
+            close()
+            if ui['on_complete']:
+                ui['on_complete'](book)
+        
+        dialog.protocol('WM_DELETE_WINDOW', close)
+        
+        # Read-only mode: only the Close button is shown
+        ui['close_btn'] = tk.Button(button_frame, text='✕ Close', command=close,
+                                    bg='#e74c3c', fg='white', font=('Segoe UI', 10, 'bold'),
+                                    relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#c0392b', activeforeground='white')
+        
+        # Edit mode: Save and Cancel buttons
+        # Success button (green)
+        ui['save_btn'] = tk.Button(button_frame, text='💾 Save', command=save, 
+                                   bg='#26a65b', fg='white', font=('Segoe UI', 10, 'bold'),
+                                   relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#229954', activeforeground='white')
+        
+        # Cancel button (red)
+        ui['cancel_btn'] = tk.Button(button_frame, text='✕ Cancel', command=close,
+                                     bg='#e74c3c', fg='white', font=('Segoe UI', 10, 'bold'),
+                                     relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#c0392b', activeforeground='white')
+        
+        dialog.transient(self.root)
+        return ui
+    
+    def show_book_dialog(self, book_data=None, read_only=False, on_complete=None):
+        """Show the book dialog; on Save, on_complete is called with the entered book tuple"""
+        # The dialog is built on first use and then reused
+        if self._book_dialog is None:
+            self._book_dialog = self._build_book_dialog()
+        ui = self._book_dialog
+        dialog = ui['dialog']
+        
+        # Set title based on mode
+        if read_only:
+            dialog.title('📖 View Book')
+        else:
+            dialog.title('Add Book' if not book_data else 'Edit Book')
+        
+        # Fill in the fields (empty for a new book)
+        values = book_data if book_data else ('',) * len(ui['fields'])
+        for field, value in zip(ui['fields'], values):
+            if isinstance(field, tk.Text):
+                field.delete('1.0', 'end')
+                field.insert('1.0', str(value))
+            else:
+                field.delete(0, 'end')
+                field.insert(0, str(value))
         
         # Show different buttons based on mode
+        ui['read_only'] = read_only
+        for button in (ui['close_btn'], ui['save_btn'], ui['cancel_btn']):
+            button.pack_forget()
         if read_only:
-            # Read-only mode: only show Close button
-            close_btn = tk.Button(button_frame, text='✕ Close', command=dialog.destroy,
-                                  bg='#e74c3c', fg='white', font=('Segoe UI', 10, 'bold'),
-                                  relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#c0392b', activeforeground='white')
-            close_btn.pack(side='left', padx=5)
+            ui['close_btn'].pack(side='left', padx=5)
         else:
-            # Edit mode: show Save and Cancel buttons
-            # Success button (green)
-            save_btn = tk.Button(button_frame, text='💾 Save', command=save, 
-                                bg='#26a65b', fg='white', font=('Segoe UI', 10, 'bold'),
-                                relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#229954', activeforeground='white')
-            save_btn.pack(side='left', padx=5)
-            
-            # Cancel button (red)
-            cancel_btn = tk.Button(button_frame, text='✕ Cancel', command=dialog.destroy,
-                                  bg='#e74c3c', fg='white', font=('Segoe UI', 10, 'bold'),
-                                  relief='flat', padx=12, pady=6, cursor='hand2', activebackground='#c0392b', activeforeground='white')
-            cancel_btn.pack(side='left', padx=5)
+            ui['save_btn'].pack(side='left', padx=5)
+            ui['cancel_btn'].pack(side='left', padx=5)
         
-        # Make dialog modal and wait for it to close
-        dialog.transient(self.root)
-        dialog.grab_set()
-
-        self.root.wait_window(dialog)
-
+        ui['on_complete'] = on_complete
         
-        return result['data'] if result['ok'] else None
+        # Make dialog modal; Save calls on_complete instead of this method waiting for it
+        dialog.deiconify()
+        dialog.grab_set()
 
 
 def main():
     root = ttk.Window(themename='darkly')
     
     # Set window and taskbar icon FIRST (before other config)
-    icon_path = APP_DIR / 'icon' / 'msf-favicon.ico'
-    if icon_path.exists():
+    if ICON_PATH:
         try:
-            root.iconbitmap(str(icon_path))
+            root.iconbitmap(ICON_PATH)
         except Exception as e:
             pass  # Icon not available on all systems
     